@@ -4,78 +4,498 @@ import os
 import sys
 import time
 import subprocess
+import logging
+import re
+import json
+import errno
 import glob
-from PyPDF2 import PdfMerger
-import concurrent.futures
+import heapq
+import uuid
+import shutil
+import pathlib
+import tempfile
+import contextlib
+
+# pikepdf is only needed for --merge; --server runs under LibreOffice's bundled Python, which lacks it.
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+# Only used to size merge groups against the open-file limit; not available on Windows.
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# The UNO bridge ships with LibreOffice and is only needed for --server mode.
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+logger = logging.getLogger(__name__)
 
 LIBREOFFICE_PATH = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
+# Overrides the parallel worker count, e.g. on memory-constrained hosts.
+WORKERS_ENV_VAR = "PPTX_PDF_WORKERS"
+# Matches any glob metacharacter; arguments without one are taken as literal paths.
+_GLOB_RE = re.compile(r"[*?\[]")
+# FilterData for LibreOffice's impress_pdf_Export filter. The defaults skip
+# work most CLI users don't need: full-resolution images, bookmarks and speaker notes pages.
+DEFAULT_EXPORT_OPTIONS = {
+    "ReduceImageResolution": True,
+    "MaxImageResolution": 150,
+    "SelectPdfVersion": 0,
+    "ExportBookmarks": False,
+    "ExportNotesPages": False,
+}
+# Write buffer for the merged PDF; large outputs need far fewer write() calls than with the default.
+MERGE_WRITE_BUFFER = 1 << 20
+# Most source PDFs held open at once while merging; larger merges go through intermediate files.
+MERGE_GROUP_SIZE = 100
+
+@contextlib.contextmanager
+def isolated_profile():
+    """
+    Creates a throwaway LibreOffice user profile and yields the matching
+    -env:UserInstallation argument. Concurrent soffice processes sharing the
+    default profile hand work off to each other and exit early, so every
+    process gets its own. The profile is removed on exit.
+    """
+    profile_dir = tempfile.mkdtemp(prefix="lo_profile_")
+    try:
+        yield "-env:UserInstallation=" + pathlib.Path(profile_dir).as_uri()
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+def pdf_export_target(export_options=None):
+    """
+    Builds the --convert-to argument for soffice, passing export_options
+    (default: DEFAULT_EXPORT_OPTIONS) to the PDF filter as JSON FilterData.
+    """
+    if export_options is None:
+        export_options = DEFAULT_EXPORT_OPTIONS
+    filter_data = {
+        name: {"type": "boolean" if isinstance(value, bool) else "long", "value": str(value).lower()}
+        for name, value in export_options.items()
+    }
+    return "pdf:impress_pdf_Export:" + json.dumps(filter_data, separators=(",", ":"))
+
+def _uno_property(name, value):
+    """Builds a UNO PropertyValue for passing load/store arguments."""
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+class LibreOfficeServer:
+    """
+    Runs one headless LibreOffice instance in UNO accept mode and converts
+    documents over a named pipe, so LibreOffice starts once instead of per file.
+    Each server gets its own pipe name, so it never talks to another instance.
+    Use as a context manager; the instance is shut down on exit.
+    """
+
+    def __init__(self, timeout=30):
+        self.pipe_name = f"pptx_pdf_{uuid.uuid4().hex}"
+        self.timeout = timeout
+        self.process = None
+        self.desktop = None
+        self._resources = None
+
+    def __enter__(self):
+        # Owns the profile directory, which is removed only after LibreOffice has exited.
+        self._resources = contextlib.ExitStack()
+        try:
+            profile_arg = self._resources.enter_context(isolated_profile())
+            self.process = subprocess.Popen(
+                [LIBREOFFICE_PATH, profile_arg, "--headless", f"--accept=pipe,name={self.pipe_name};urp;",
+                 "--norestore", "--nologo", "--nodefault"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            self.desktop = self._connect()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass  # The bridge drops as LibreOffice exits.
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+        if self._resources is not None:
+            self._resources.close()
+            self._resources = None
+
+    def _connect(self):
+        """Waits for our LibreOffice to accept on its pipe and returns its Desktop."""
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                # The pipe only exists once LibreOffice has finished starting up.
+                if self.process.poll() is not None:
+                    raise RuntimeError("LibreOffice exited before accepting connections.")
+                if time.time() > deadline:
+                    raise RuntimeError(f"LibreOffice did not accept connections within {self.timeout}s.")
+                time.sleep(0.2)
+        return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def convert(self, input_file, output_dir, export_options=None):
+        """Converts one PPTX file to PDF in output_dir and returns the PDF path."""
+        if export_options is None:
+            export_options = DEFAULT_EXPORT_OPTIONS
+        input_url = uno.systemPathToFileUrl(os.path.abspath(input_file))
+        output_file = _pdf_output_path(input_file, output_dir)
+        output_url = uno.systemPathToFileUrl(os.path.abspath(output_file))
+        filter_data = uno.Any("[]com.sun.star.beans.PropertyValue",
+                              tuple(_uno_property(name, value) for name, value in export_options.items()))
+        store_args = (_uno_property("FilterName", "impress_pdf_Export"), _uno_property("FilterData", filter_data))
+        document = self.desktop.loadComponentFromURL(
+            input_url, "_blank", 0, (_uno_property("Hidden", True),))
+        # LibreOffice returns no document, rather than raising, for files it cannot open.
+        if document is None:
+            raise RuntimeError(f"LibreOffice could not load '{input_file}'")
+        try:
+            # uno.invoke keeps the explicit sequence type of FilterData intact.
+            uno.invoke(document, "storeToURL", (output_url, store_args))
+        finally:
+            document.close(True)
+        return output_file
+
+def worker_count(num_files):
+    """
+    Returns how many LibreOffice processes to run in parallel: one per CPU,
+    capped at the number of files, unless PPTX_PDF_WORKERS is set.
+    """
+    override = os.environ.get(WORKERS_ENV_VAR)
+    if override:
+        try:
+            workers = int(override)
+        except ValueError:
+            logger.warning("❌ Warning: Ignoring invalid %s=%r (expected an integer).", WORKERS_ENV_VAR, override)
+        else:
+            return max(1, min(num_files, workers))
+    return max(1, min(num_files, os.cpu_count() or 2))
+
+def _run_quiet(command):
+    """
+    Runs a command, discarding its output.
+    stderr goes to a temporary file instead of a pipe, so a chatty child can
+    never block on a full pipe, and is attached to the CalledProcessError
+    only if the command fails.
+    """
+    with tempfile.TemporaryFile() as err:
+        try:
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=err)
+        except subprocess.CalledProcessError as e:
+            err.seek(0)
+            e.stderr = err.read()
+            raise
 
-def convert_single(input_file, output_dir):
-    """Converts a single PPTX file to PDF using LibreOffice."""
-    if not os.path.exists(input_file):
-        print(f"❌ Error: File '{input_file}' does not exist. Skipping.")
+def run_soffice(args):
+    """Runs soffice with the given arguments in a throwaway profile."""
+    with isolated_profile() as profile_arg:
+        _run_quiet([LIBREOFFICE_PATH, profile_arg, *args])
+
+def _describe_process_error(error):
+    """Formats a failed subprocess run, including its stderr when there is any."""
+    detail = error.stderr.decode(errors="replace").strip() if error.stderr else ""
+    return f"{error}\n{detail}" if detail else str(error)
+
+def _expand_inputs(items, ext):
+    """
+    Expands glob patterns in items and returns the paths ending in ext
+    (compared case-insensitively), reporting any other files as skipped.
+    A pattern that matches nothing but names an existing file, such as
+    "Deck [final].pptx", is kept as a literal path.
+    """
+    files = []
+    for item in items:
+        if not _GLOB_RE.search(item):
+            files.append(item)
+            continue
+        matches = glob.glob(item)
+        if matches:
+            files.extend(matches)
+        elif os.path.exists(item):
+            files.append(item)
+        else:
+            logger.warning("❌ Skipping pattern '%s' - no matching files", item)
+
+    valid_files = []
+    for file in files:
+        if file.lower().endswith(ext):
+            valid_files.append(file)
+        else:
+            logger.warning("❌ Skipping file '%s' - invalid file type (expected %s)", file, ext)
+    return valid_files
+
+def _filter_existing(files):
+    """
+    Returns the files that exist, reporting the rest as skipped.
+    Each parent directory is listed once rather than stat-ing every file.
+    """
+    listings = {}
+    existing_files = []
+    for file in files:
+        directory = os.path.dirname(file)
+        if directory not in listings:
+            try:
+                with os.scandir(directory or ".") as entries:
+                    listings[directory] = {entry.name for entry in entries}
+            except OSError:
+                listings[directory] = set()
+        # Fall back to a stat on a miss, e.g. for differently-cased names on case-insensitive filesystems.
+        if os.path.basename(file) in listings[directory] or os.path.exists(file):
+            existing_files.append(file)
+        else:
+            logger.error("❌ Error: File '%s' does not exist. Skipping.", file)
+    return existing_files
+
+def _pdf_output_path(input_file, output_dir):
+    """Returns the path LibreOffice writes the PDF for input_file to."""
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(input_file))[0] + ".pdf")
+
+def _output_signature(path):
+    """Identifies the current version of a file, or returns None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
         return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def _snapshot_outputs(input_files, output_dir):
+    """Records the state of each input's PDF before a conversion run."""
+    return {file: _output_signature(_pdf_output_path(file, output_dir)) for file in input_files}
+
+def _was_converted(input_file, output_dir, snapshot):
+    """Whether this run wrote a PDF for input_file, i.e. it exists and has changed since the snapshot."""
+    signature = _output_signature(_pdf_output_path(input_file, output_dir))
+    return signature is not None and signature != snapshot[input_file]
+
+def convert_single(input_file, output_dir, export_options=None):
+    """
+    Converts a single PPTX file to PDF using LibreOffice.
+    The caller is expected to have filtered out missing files.
+    """
+    snapshot = _snapshot_outputs([input_file], output_dir)
     try:
-        result = subprocess.run(
-            [LIBREOFFICE_PATH, "--headless", "--convert-to", "pdf", "--outdir", output_dir, input_file],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        print(f"✅ Converted: {input_file} → {output_dir}")
-        return input_file
+        run_soffice(["--headless", "--convert-to", pdf_export_target(export_options), "--outdir", output_dir, input_file])
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error converting {input_file}: {e}")
+        logger.error("❌ Error converting %s: %s", input_file, _describe_process_error(e))
+        return None
+    # soffice exits 0 even when it skips a file it cannot load.
+    if not _was_converted(input_file, output_dir, snapshot):
+        logger.error("❌ Error converting %s: LibreOffice did not write a PDF", input_file)
         return None
+    logger.info("✅ Converted: %s → %s", input_file, output_dir)
+    return input_file
 
-def convert_pptx_to_pdf(input_files, output_dir, parallel=False):
+def _collect_batch(input_files, output_dir, snapshot, error=None, export_options=None):
+    """
+    Reports a per-file result for a batched soffice run and returns the
+    converted files. Success is judged by whether each file's PDF was written,
+    since soffice exits 0 even when it skips files it cannot load. If the run
+    failed (error is its CalledProcessError), files without a PDF are retried
+    one at a time, so one crashing deck does not fail the rest of its batch.
+    """
+    converted = []
+    missing = []
+    for input_file in input_files:
+        if _was_converted(input_file, output_dir, snapshot):
+            logger.info("✅ Converted: %s → %s", input_file, output_dir)
+            converted.append(input_file)
+        else:
+            missing.append(input_file)
+
+    if error is not None and missing:
+        logger.warning("❌ Warning: LibreOffice failed during a batch, retrying %d file(s) individually: %s",
+                       len(missing), _describe_process_error(error))
+        for input_file in missing:
+            if convert_single(input_file, output_dir, export_options):
+                converted.append(input_file)
+    else:
+        for input_file in missing:
+            logger.error("❌ Error converting %s: LibreOffice did not write a PDF", input_file)
+    return converted
+
+def convert_batch(input_files, output_dir, export_options=None):
+    """
+    Converts several PPTX files to PDF with a single LibreOffice invocation,
+    so the LibreOffice startup cost is paid once for the whole batch.
+    Returns the files that were converted.
+    """
+    snapshot = _snapshot_outputs(input_files, output_dir)
+    try:
+        run_soffice(["--headless", "--convert-to", pdf_export_target(export_options), "--outdir", output_dir, *input_files])
+    except subprocess.CalledProcessError as e:
+        return _collect_batch(input_files, output_dir, snapshot, e, export_options)
+    return _collect_batch(input_files, output_dir, snapshot, export_options=export_options)
+
+def _file_size(path):
+    """Returns a file's size in bytes, or 0 if it cannot be read."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _shard_by_size(files, num_shards):
+    """
+    Splits files into at most num_shards lists of similar total size.
+    Files are placed largest first, each onto the currently lightest shard,
+    so one big deck is never left running alone at the end.
+    """
+    shards = [[] for _ in range(min(num_shards, len(files)))]
+    # Ties on size (e.g. empty or unreadable files) go to the shard with fewer files.
+    loads = [(0, 0, i) for i in range(len(shards))]
+    sized_files = sorted(((_file_size(file), file) for file in files), reverse=True)
+    for size, file in sized_files:
+        load, count, i = heapq.heappop(loads)
+        shards[i].append(file)
+        heapq.heappush(loads, (load + size, count + 1, i))
+    return shards
+
+def convert_parallel(input_files, output_dir, max_workers, export_options=None):
+    """
+    Converts PPTX files with up to max_workers concurrent LibreOffice processes.
+    The files are split into one size-balanced batch per worker, every batch
+    is started without waiting on the others, and then all of them are collected.
+    """
+    shards = _shard_by_size(input_files, max_workers)
+    target = pdf_export_target(export_options)
+    snapshot = _snapshot_outputs(input_files, output_dir)
+    converted = []
+    with contextlib.ExitStack() as stack:
+        running = []
+        for shard in shards:
+            profile_arg = stack.enter_context(isolated_profile())
+            err = stack.enter_context(tempfile.TemporaryFile())
+            process = subprocess.Popen(
+                [LIBREOFFICE_PATH, profile_arg, "--headless", "--convert-to", target, "--outdir", output_dir, *shard],
+                stdout=subprocess.DEVNULL,
+                stderr=err
+            )
+            # Never remove a profile while its process may still be using it.
+            stack.callback(process.wait)
+            running.append((shard, process, err))
+
+        for shard, process, err in running:
+            error = None
+            if process.wait() != 0:
+                err.seek(0)
+                error = subprocess.CalledProcessError(process.returncode, process.args, stderr=err.read())
+            converted.extend(_collect_batch(shard, output_dir, snapshot, error, export_options))
+    return converted
+
+def convert_with_server(server, input_file, output_dir, export_options=None):
+    """Converts a single PPTX file to PDF through a running LibreOfficeServer."""
+    try:
+        server.convert(input_file, output_dir, export_options)
+        logger.info("✅ Converted: %s → %s", input_file, output_dir)
+        return input_file
+    except Exception as e:
+        logger.error("❌ Error converting %s: %s", input_file, e)
+        return None
+
+def convert_pptx_to_pdf(input_files, output_dir, parallel=False, use_server=False, export_options=None):
     """
     Converts multiple .pptx files to .pdf using LibreOffice.
     Accepts either a glob pattern (string) or an explicit list of file paths.
     Only files with a .pptx extension are processed.
     Runs sequentially by default; use parallel=True for parallel conversion.
+    With use_server=True, a single LibreOffice instance is driven over UNO.
+    export_options overrides DEFAULT_EXPORT_OPTIONS for the PDF export filter.
     """
-    # Expand glob patterns if needed.
+    # Expand glob patterns and filter for valid .pptx files.
     if isinstance(input_files, str):
-        pptx_files = glob.glob(input_files)
-    elif isinstance(input_files, list):
-        pptx_files = []
-        for item in input_files:
-            if "*" in item or "?" in item:
-                pptx_files.extend(glob.glob(item))
-            else:
-                pptx_files.append(item)
-    else:
-        pptx_files = []
+        input_files = [input_files]
+    elif not isinstance(input_files, list):
+        input_files = []
+    valid_files = _expand_inputs(input_files, '.pptx')
 
-    # Filter for valid .pptx files.
-    valid_files = []
-    for file in pptx_files:
-        if file.lower().endswith('.pptx'):
-            valid_files.append(file)
-        else:
-            print(f"❌ Skipping file '{file}' - invalid file type (expected .pptx)")
+    if not valid_files:
+        logger.error("❌ No valid .pptx files found.")
+        sys.exit(1)
+
+    # Drop missing files up front; a batched LibreOffice call reports errors per batch, not per file.
+    valid_files = _filter_existing(valid_files)
 
     if not valid_files:
-        print("❌ No valid .pptx files found.")
+        logger.error("❌ No valid .pptx files found.")
         sys.exit(1)
 
-    print("Valid PPTX files found:", valid_files)
+    logger.info("Valid PPTX files found: %s", valid_files)
     
     # Ensure output directory exists.
     os.makedirs(output_dir, exist_ok=True)
 
-    if parallel:
-        # Use ProcessPoolExecutor to convert files in parallel.
-        with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(convert_single, file, output_dir) for file in valid_files]
-            # Wait for all futures to complete.
-            for future in concurrent.futures.as_completed(futures):
-                future.result()  # Re-raises any exceptions caught in the worker.
+    if use_server and uno is None:
+        logger.warning("❌ Warning: LibreOffice's 'uno' module is not available. Falling back to batch conversion.")
+        use_server = False
+
+    if use_server:
+        with LibreOfficeServer() as server:
+            for file in valid_files:
+                convert_with_server(server, file, output_dir, export_options)
+    elif len(valid_files) == 1:
+        # A single file needs neither a worker pool nor a batch.
+        convert_single(valid_files[0], output_dir, export_options)
+    elif parallel:
+        convert_parallel(valid_files, output_dir, worker_count(len(valid_files)), export_options)
     else:
-        # Sequential processing.
-        for file in valid_files:
-            convert_single(file, output_dir)
+        # Sequential processing: convert every file in one LibreOffice invocation.
+        convert_batch(valid_files, output_dir, export_options)
+
+def optimize_pdf(pdf_file):
+    """
+    Rewrites a PDF with Ghostscript so that images and fonts duplicated across
+    merged documents are stored once. The file is replaced only if Ghostscript
+    succeeds; returns True when the PDF was optimized.
+    """
+    gs_path = shutil.which("gs")
+    if gs_path is None:
+        logger.warning("❌ Warning: Ghostscript ('gs') not found. Skipping optimization.")
+        return False
+    optimized_file = f"{pdf_file}.opt"
+    try:
+        # Ghostscript reads '%' in -sOutputFile as a page-number template, so it must be doubled.
+        _run_quiet(
+            [gs_path, "-dBATCH", "-dNOPAUSE", "-dSAFER", "-dDetectDuplicateImages=true",
+             "-dCompressFonts=true", "-sDEVICE=pdfwrite", "-dPDFSETTINGS=/printer",
+             "-sOutputFile=" + optimized_file.replace("%", "%%"), pdf_file]
+        )
+        os.replace(optimized_file, pdf_file)
+    except subprocess.CalledProcessError as e:
+        error = _describe_process_error(e)
+    except OSError as e:
+        error = e
+    else:
+        logger.info("✅ Optimized: %s", pdf_file)
+        return True
+    # The merged PDF is left as it was; only the partial output is discarded.
+    logger.error("❌ Error optimizing %s: %s", pdf_file, error)
+    with contextlib.suppress(OSError):
+        os.remove(optimized_file)
+    return False
 
 def parse_range_input(input_str, max_len):
     """
@@ -99,16 +519,15 @@ def parse_range_input(input_str, max_len):
                 raise ValueError("Non-integer range bounds in: " + token)
             if start > end:
                 raise ValueError("Range start must not be greater than end in: " + token)
-            # Add all numbers in the range (inclusive)
-            for i in range(start, end + 1):
-                indices.append(i - 1)  # Convert to 0-indexed
+            # Add all numbers in the range (inclusive), converted to 0-indexed.
+            indices.extend(range(start - 1, end))
         else:
             try:
                 indices.append(int(token) - 1)
             except ValueError:
                 raise ValueError("Invalid token, not an integer: " + token)
     # Validate indices.
-    if any(idx < 0 or idx >= max_len for idx in indices):
+    if min(indices, default=0) < 0 or max(indices, default=-1) >= max_len:
         raise ValueError("One or more indices are out of valid range.")
     return indices
 
@@ -143,100 +562,166 @@ def interactive_merge_order(valid_files):
         else:
             print("Let's try again.\n")
 
-def merge_pdfs(pdf_patterns, output_file):
+def _merge_group_size():
+    """
+    Returns how many source PDFs may be open at once while merging:
+    MERGE_GROUP_SIZE, or half the soft open-file limit if that is lower.
+    """
+    if resource is None:
+        return MERGE_GROUP_SIZE
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == resource.RLIM_INFINITY:
+        return MERGE_GROUP_SIZE
+    return max(2, min(MERGE_GROUP_SIZE, soft_limit // 2))
+
+def _save_merged(pdf_files, output_file):
+    """Concatenates pdf_files into output_file."""
+    # pikepdf reads page content from the source files lazily, so every
+    # source stays open until the merged PDF has been saved.
+    with pikepdf.Pdf.new() as merged, contextlib.ExitStack() as sources:
+        for pdf in pdf_files:
+            source = sources.enter_context(pikepdf.Pdf.open(pdf))
+            merged.pages.extend(source.pages)
+        with open(output_file, "wb", buffering=MERGE_WRITE_BUFFER) as fh:
+            merged.save(fh, linearize=False, compress_streams=True,
+                        object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
+def _merge_in_groups(pdf_files, output_file):
+    """
+    Merges pdf_files into output_file without holding more than
+    _merge_group_size() sources open at once. Larger inputs are merged
+    group by group into temporary files, which are then merged in turn.
+    """
+    group_size = _merge_group_size()
+    with tempfile.TemporaryDirectory(prefix="pdf_merge_") as tmp_dir:
+        level = 0
+        while len(pdf_files) > group_size:
+            parts = []
+            for start in range(0, len(pdf_files), group_size):
+                part = os.path.join(tmp_dir, f"part_{level}_{start // group_size}.pdf")
+                _save_merged(pdf_files[start:start + group_size], part)
+                parts.append(part)
+            pdf_files = parts
+            level += 1
+        _save_merged(pdf_files, output_file)
+
+def merge_pdfs(pdf_patterns, output_file, optimize=False):
     """
     Merges multiple PDFs into one.
     Accepts explicit filenames or glob patterns.
     Only files with a .pdf extension are processed.
     Provides an interactive interface to select the merge order.
+    With optimize=True, the merged PDF is post-processed with Ghostscript.
     """
-    pdf_files = []
-    for item in pdf_patterns:
-        if "*" in item or "?" in item:
-            pdf_files.extend(glob.glob(item))
-        else:
-            pdf_files.append(item)
-    
-    # Filter for valid .pdf files.
-    valid_files = []
-    for file in pdf_files:
-        if file.lower().endswith('.pdf'):
-            valid_files.append(file)
-        else:
-            print(f"❌ Skipping file '{file}' - invalid file type (expected .pdf)")
+    if pikepdf is None:
+        logger.error("❌ Error: Merging requires pikepdf. Install it with 'pip install pikepdf'.")
+        sys.exit(1)
+
+    valid_files = _expand_inputs(pdf_patterns, '.pdf')
     
     if len(valid_files) < 2:
-        print("❌ Error: You need at least two valid PDF files to merge.")
+        logger.error("❌ Error: You need at least two valid PDF files to merge.")
         sys.exit(1)
 
-    print("PDF files found:")
-    print(valid_files)
+    logger.info("PDF files found:")
+    logger.info("%s", valid_files)
     
     # Ask the user for the desired order interactively and confirm it.
     ordered_files = interactive_merge_order(valid_files)
-    print("Merging files in the following order:")
+    logger.info("Merging files in the following order:")
     for file in ordered_files:
-        print(f"  {file}")
+        logger.info("  %s", file)
     
     if not output_file.lower().endswith('.pdf'):
-        print("❌ Warning: Output file does not have a .pdf extension.")
+        logger.warning("❌ Warning: Output file does not have a .pdf extension.")
 
     # Start the timer after the interactive order is set.
     merge_start_time = time.time()
     
-    merger = PdfMerger()
-    for pdf in ordered_files:
-        if not os.path.exists(pdf):
-            print(f"❌ Error: File '{pdf}' does not exist. Skipping.")
-            continue
-        merger.append(pdf)
-    
     try:
-        merger.write(output_file)
-        merger.close()
+        _merge_in_groups(_filter_existing(ordered_files), output_file)
+        if optimize:
+            optimize_pdf(output_file)
         merge_end_time = time.time()
         merge_elapsed = merge_end_time - merge_start_time
-        print(f"✅ PDFs merged successfully! Output: {output_file}")
-        print(f"Total merge time: {merge_elapsed:.2f} seconds")
+        logger.info("✅ PDFs merged successfully! Output: %s", output_file)
+        logger.info("Total merge time: %.2f seconds", merge_elapsed)
+    except OSError as e:
+        if e.errno != errno.EMFILE:
+            logger.error("❌ Error during merging: %s", e)
+        else:
+            logger.error("❌ Error during merging: too many open files. Raise the limit with 'ulimit -n' and try again.")
+        sys.exit(1)
     except Exception as e:
-        print(f"❌ Error during merging: {e}")
+        logger.error("❌ Error during merging: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Status messages go through logging so importers can silence them; the CLI prints them plainly.
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # Minimum arguments: script, action, at least one input file/pattern, and an output directory (or output PDF)
     if len(sys.argv) < 4:
         print("Usage:")
         print("  Convert PPTX to PDF (sequential): pp.py --convert <pptx_file(s) or pattern> <output_directory>")
         print("  Convert PPTX to PDF (parallel):   pp.py --convert --parallel <pptx_file(s) or pattern> <output_directory>")
+        print("  Convert PPTX to PDF (UNO server): pp.py --convert --server <pptx_file(s) or pattern> <output_directory>")
+        print("  PDF export options (convert):     --full-resolution, --max-image-resolution=<dpi> (default 150), --bookmarks, --notes")
         print("  Merge PDFs: pp.py --merge <output_pdf> <input_pdf(s) or patterns>")
+        print("  Merge PDFs (optimized):  pp.py --merge --optimize <output_pdf> <input_pdf(s) or patterns>")
         sys.exit(1)
 
     action = sys.argv[1]
     if action == "--convert":
         start_time = time.time()
-        parallel_mode = False
+        # Collect option flags that precede the input files.
+        options = set()
+        export_options = dict(DEFAULT_EXPORT_OPTIONS)
         args_offset = 2
-        if sys.argv[2] == "--parallel":
-            parallel_mode = True
-            args_offset = 3
+        while args_offset < len(sys.argv) and sys.argv[args_offset].startswith("--"):
+            flag = sys.argv[args_offset]
+            if flag in ("--parallel", "--server"):
+                options.add(flag)
+            elif flag == "--full-resolution":
+                export_options["ReduceImageResolution"] = False
+            elif flag.startswith("--max-image-resolution="):
+                try:
+                    export_options["MaxImageResolution"] = int(flag.split("=", 1)[1])
+                except ValueError:
+                    logger.error("❌ Error: Invalid image resolution in '%s' (expected DPI as an integer).", flag)
+                    sys.exit(1)
+            elif flag == "--bookmarks":
+                export_options["ExportBookmarks"] = True
+            elif flag == "--notes":
+                export_options["ExportNotesPages"] = True
+            else:
+                logger.error("❌ Error: Unknown option '%s'.", flag)
+                sys.exit(1)
+            args_offset += 1
+        parallel_mode = "--parallel" in options
+        server_mode = "--server" in options
         # All arguments after the flag: all except the last are input file(s)/pattern, last is output directory.
         input_args = sys.argv[args_offset:-1]
         output_directory = sys.argv[-1]
         # If there's exactly one argument and it contains a wildcard, treat it as a pattern.
-        if len(input_args) == 1 and ("*" in input_args[0] or "?" in input_args[0]):
-            convert_pptx_to_pdf(input_args[0], output_directory, parallel=parallel_mode)
+        if len(input_args) == 1 and _GLOB_RE.search(input_args[0]):
+            convert_pptx_to_pdf(input_args[0], output_directory, parallel=parallel_mode, use_server=server_mode,
+                                export_options=export_options)
         else:
-            convert_pptx_to_pdf(input_args, output_directory, parallel=parallel_mode)
+            convert_pptx_to_pdf(input_args, output_directory, parallel=parallel_mode, use_server=server_mode,
+                                export_options=export_options)
         end_time = time.time()
         elapsed_time = end_time - start_time
-        print(f"Total conversion time: {elapsed_time:.2f} seconds")
+        logger.info("Total conversion time: %.2f seconds", elapsed_time)
 
     elif action == "--merge":
-        output_pdf = sys.argv[2]
-        input_pdfs = sys.argv[3:]
-        merge_pdfs(input_pdfs, output_pdf)
+        optimize_mode = sys.argv[2] == "--optimize"
+        args_offset = 3 if optimize_mode else 2
+        output_pdf = sys.argv[args_offset]
+        input_pdfs = sys.argv[args_offset + 1:]
+        merge_pdfs(input_pdfs, output_pdf, optimize=optimize_mode)
 
     else:
-        print("❌ Error: Unknown action. Use '--convert' or '--merge'.")
+        logger.error("❌ Error: Unknown action. Use '--convert' or '--merge'.")
         sys.exit(1)
 